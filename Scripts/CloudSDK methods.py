@@ -8,12 +8,19 @@ Usage:
 
 import argparse
 import importlib
+import operator
 import inspect
+import os
+import pickle
 import pkgutil
 import sys
 from types import ModuleType
 from typing import Iterable, List, Tuple, Set
 
+# In-process cache of walked packages, plus an on-disk pickle of the module
+# names so warm runs skip the pkgutil directory scan entirely.
+_WALK_CACHE: dict = {}
+
 BLOCKLIST_NAMES: Set[str] = {
     # common model/serialization/boilerplate
     "to_dict", "from_dict", "to_json", "from_json", "schema", "dict", "json",
@@ -40,20 +47,42 @@ def matches_keywords(name: str, keywords: Iterable[str]) -> bool:
     lname = name.lower()
     return any(k.strip().lower() in lname for k in keywords if k.strip())
 
-def signature_of(obj) -> str:
-    try:
-        return str(inspect.signature(obj))
-    except Exception:
-        return "(...)"
+# inspect.signature/getdoc are expensive and the same callables show up
+# repeatedly (module listing, class listing, CloudSDK section), so both
+# helpers memoize by object identity. The modules keep the objects alive,
+# so id() keys stay valid for the life of the run.
+def signature_of(obj, _cache={}) -> str:
+    key = id(obj)
+    sig = _cache.get(key)
+    if sig is None:
+        try:
+            sig = str(inspect.signature(obj))
+        except Exception:
+            sig = "(...)"
+        _cache[key] = sig
+    return sig
 
-def oneline_doc(obj, max_len=100) -> str:
-    doc = inspect.getdoc(obj) or ""
-    first = doc.strip().splitlines()[0] if doc else ""
-    return (first[: max_len - 1] + "…") if len(first) > max_len else first
+def oneline_doc(obj, max_len=100, _cache={}) -> str:
+    key = (id(obj), max_len)
+    first = _cache.get(key)
+    if first is None:
+        doc = inspect.getdoc(obj) or ""
+        first = doc.strip().splitlines()[0] if doc else ""
+        if len(first) > max_len:
+            first = first[: max_len - 1] + "…"
+        _cache[key] = first
+    return first
 
 def list_module_functions(mod: ModuleType, keywords: Iterable[str]):
-    for name, obj in inspect.getmembers(mod, lambda o: inspect.isfunction(o) or inspect.isbuiltin(o)):
-        if getattr(obj, "__module__", "").split(".")[0] != mod.__name__.split(".")[0]:
+    # vars() iteration avoids getmembers' dir() + getattr walk, which wakes
+    # descriptors and module __getattr__ hooks for every attribute.
+    root_pkg = mod.__name__.split(".")[0]
+    isfunction = inspect.isfunction
+    isbuiltin = inspect.isbuiltin
+    for name, obj in vars(mod).items():
+        if not (isfunction(obj) or isbuiltin(obj)):
+            continue
+        if getattr(obj, "__module__", "").split(".")[0] != root_pkg:
             # Skip foreign functions pulled in from other packages
             continue
         if public_name(name) and matches_keywords(name, keywords):
@@ -66,33 +95,104 @@ def list_module_classes(mod: ModuleType):
                 yield cls
 
 def list_class_methods(cls, keywords: Iterable[str]):
+    # Walk the MRO directly: the first class defining a name is both the
+    # resolution winner and the owner, so no second owner lookup is needed.
     seen = set()
-    for name, member in inspect.getmembers(cls):
-        is_call = (
-            inspect.isfunction(member)
-            or inspect.ismethod(member)
-            or inspect.ismethoddescriptor(member)
-            or inspect.isbuiltin(member)
-        )
-        if not is_call or not public_name(name) or not matches_keywords(name, keywords):
-            continue
-        # de-dupe across MRO
-        if name in seen:
-            continue
-        seen.add(name)
-        # where defined?
-        owner = next((base for base in cls.__mro__ if name in getattr(base, "__dict__", {})), cls)
-        yield (name, owner.__name__, member)
+    isfunction = inspect.isfunction
+    ismethod = inspect.ismethod
+    ismethoddescriptor = inspect.ismethoddescriptor
+    isbuiltin = inspect.isbuiltin
+    for base in cls.__mro__:
+        if base is object:
+            # Nothing public lives on object; stop before scanning its dunders.
+            break
+        for name, member in vars(base).items():
+            if name in seen:
+                continue
+            seen.add(name)
+            if isinstance(member, (staticmethod, classmethod)):
+                member = member.__func__
+            is_call = (
+                isfunction(member)
+                or ismethod(member)
+                or ismethoddescriptor(member)
+                or isbuiltin(member)
+            )
+            if not is_call or not public_name(name) or not matches_keywords(name, keywords):
+                continue
+            yield (name, base.__name__, member)
+
+def _mod_cache_path() -> str:
+    out_dir = os.getenv("output_path", ".")
+    return os.path.join(out_dir, ".eecloud_mods.pkl")
+
+
+def _load_cached_names(root, key):
+    try:
+        with open(_mod_cache_path(), "rb") as f:
+            cached = pickle.load(f)
+        if cached.get("key") == key:
+            return cached.get("names")
+    except (OSError, pickle.PickleError, EOFError, AttributeError):
+        pass
+    return None
+
+
+def _save_cached_names(key, names):
+    try:
+        with open(_mod_cache_path(), "wb") as f:
+            pickle.dump({"key": key, "names": names}, f)
+    except OSError:
+        pass
+
+
+def _discover_names(root) -> List[str]:
+    """Enumerate submodule names with iter_modules, importing only packages
+    (needed for their __path__) and skipping __main__ entries."""
+    names: List[str] = []
+    stack = [(root.__path__, root.__name__ + ".")]
+    while stack:
+        paths, prefix = stack.pop()
+        for _, name, ispkg in pkgutil.iter_modules(paths, prefix):
+            if name.endswith("__main__"):
+                continue
+            names.append(name)
+            if ispkg:
+                pkg = safe_import(name)
+                if pkg is not None and hasattr(pkg, "__path__"):
+                    stack.append((pkg.__path__, name + "."))
+    return names
+
 
 def walk_package(root_pkg_name: str):
+    if root_pkg_name in _WALK_CACHE:
+        return _WALK_CACHE[root_pkg_name]
+
     root = safe_import(root_pkg_name)
     if not root or not hasattr(root, "__path__"):
         return []
+
+    # Module objects cannot be pickled, so the disk cache stores the submodule
+    # names keyed on interpreter/package identity and only re-walks on change.
+    root_file = getattr(root, "__file__", "") or ""
+    try:
+        mtime = os.path.getmtime(root_file) if root_file else 0
+    except OSError:
+        mtime = 0
+    key = (sys.version, root_file, mtime)
+
+    names = _load_cached_names(root, key)
+    if names is None:
+        names = _discover_names(root)
+        _save_cached_names(key, names)
+
     mods = [root]
-    for finder, name, ispkg in pkgutil.walk_packages(root.__path__, root.__name__ + "."):
+    for name in names:
         m = safe_import(name)
         if m:
             mods.append(m)
+
+    _WALK_CACHE[root_pkg_name] = mods
     return mods
 
 def print_heading(text: str):
@@ -111,17 +211,19 @@ def main():
     if not modules:
         print("[!] Could not import 'eecloud' or it has no submodules.", file=sys.stderr)
         sys.exit(1)
+    # Sort once up front; both listing passes reuse the same ordering.
+    sorted_mods = sorted(modules, key=operator.attrgetter("__name__"))
 
     # 2) Module-level functions
     print_heading("Module-level functions matching keywords")
     found_any = False
-    for mod in sorted(modules, key=lambda m: m.__name__):
+    for mod in sorted_mods:
         rows = list(list_module_functions(mod, keywords))
         if not rows:
             continue
         found_any = True
         print(f"\n[{mod.__name__}]")
-        for fqname, obj in sorted(rows, key=lambda t: t[0]):
+        for fqname, obj in sorted(rows, key=operator.itemgetter(0)):
             print(f"  - {fqname}{signature_of(obj)}")
             doc = oneline_doc(obj)
             if doc:
@@ -132,7 +234,7 @@ def main():
     # 3) Classes & their methods
     print_heading("Class methods matching keywords")
     found_any = False
-    for mod in sorted(modules, key=lambda m: m.__name__):
+    for mod in sorted_mods:
         classes = list(list_module_classes(mod))
         if not classes:
             continue
@@ -146,7 +248,7 @@ def main():
                 print(f"\n[{mod.__name__}]")
                 mod_printed = True
             print(f"  {cls.__module__}.{cls.__name__}")
-            for name, owner, member in sorted(methods, key=lambda t: (t[1], t[0])):
+            for name, owner, member in sorted(methods, key=operator.itemgetter(1, 0)):
                 owner_hint = f"  [defined on {owner}]" if owner != cls.__name__ else ""
                 print(f"    - {name}{signature_of(member)}{owner_hint}")
                 doc = oneline_doc(member)
@@ -164,7 +266,7 @@ def main():
             print_heading("eecloud.cloudsdk.CloudSDK methods (filtered)")
             methods = list(list_class_methods(CloudSDK, keywords))
             if methods:
-                for name, owner, member in sorted(methods, key=lambda t: (t[1], t[0])):
+                for name, owner, member in sorted(methods, key=operator.itemgetter(1, 0)):
                     owner_hint = f"  [defined on {owner}]" if owner != CloudSDK.__name__ else ""
                     print(f"  - {name}{signature_of(member)}{owner_hint}")
                     doc = oneline_doc(member)
@@ -0,0 +1,47 @@
+"""
+Shared APILogger setup for the pipeline scripts.
+
+Scripts call get_logger() instead of re-creating identical StreamHandler/
+FileHandler/Formatter objects at import time. The handlers sit behind a
+QueueListener so log calls only enqueue, and the file handler opens lazily
+on first write.
+"""
+
+import atexit
+import functools
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+
+@functools.lru_cache(maxsize=1)
+def get_logger():
+    logger = logging.getLogger("APILogger")
+    if logger.handlers:
+        return logger
+
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    sh = logging.StreamHandler()
+    sh.setFormatter(formatter)
+
+    log_dir = os.getenv("output_path", "./output")
+    # Single mkdir attempt instead of makedirs' stat-then-mkdir chain.
+    try:
+        os.makedirs(log_dir)
+    except FileExistsError:
+        pass
+    # delay=True defers opening the log file until the first record, so
+    # importing a script without running it stays cheap; WatchedFileHandler
+    # survives external log rotation without a reopen.
+    fh = WatchedFileHandler(os.path.join(log_dir, "GasModelcheck.log"), encoding="utf-8", delay=True)
+    fh.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, sh, fh, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return logger
@@ -0,0 +1,24 @@
+"""
+Cached .env / environment access for the pipeline scripts.
+
+master_app.py and the dashboards each called load_dotenv() and re-read
+the same environment variables on every run (and every Streamlit rerun).
+settings() parses .env once per process and hands back the resolved
+values; the lru_cache sentinel means even an empty .env still caches.
+"""
+
+import os
+import types
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+
+@lru_cache(maxsize=1)
+def settings():
+    load_dotenv()
+    return types.SimpleNamespace(
+        model_name=os.getenv("model_name"),
+        simulation_path=os.getenv("simulation_path", "/simulation"),
+        output_path=os.getenv("output_path", "./output"),
+    )
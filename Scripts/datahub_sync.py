@@ -1,25 +1,40 @@
+import functools
 import os
-from eecloud.cloudsdk import CloudSDK, SDKBase
-from eecloud.models import CommandResponse, Contracts_DatahubMapResponse, Contracts_DatahubCommandResponse
-import logging
 import threading
+import logging
+from _apilogger import get_logger
+
+
+@functools.lru_cache(maxsize=4)
+def get_cloud_sdk(cli_path):
+    """Return a CloudSDK for this CLI path, reusing one instance per path.
+
+    eecloud is imported here rather than at module top so a missing/invalid
+    CLI path (the common CI case) never pays the package import cost.
+    """
+    from eecloud.cloudsdk import CloudSDK
+    return CloudSDK(cli_path=cli_path)
 
-APILogger = logging.getLogger("APILogger")
-if not APILogger.handlers:
-    APILogger.setLevel(logging.DEBUG)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    sh = logging.StreamHandler()
-    sh.setFormatter(formatter)
-    APILogger.addHandler(sh)
-    log_dir = os.getenv("output_path", "./output")
-    os.makedirs(log_dir, exist_ok=True)
-    fh = logging.FileHandler(os.path.join(log_dir, "GasModelcheck.log"), encoding="utf-8")
-    fh.setFormatter(formatter)
-    APILogger.addHandler(fh)
+
+@functools.lru_cache(maxsize=4)
+def cli_path_valid(cli_path):
+    """One stat per CLI path per process; repeat calls hit the cache."""
+    try:
+        os.stat(cli_path)
+        return True
+    except OSError:
+        return False
+
+APILogger = get_logger()
 
 def run_with_timeout(func, timeout, *args, **kwargs):
     """
     Run a function with a timeout. If it exceeds timeout, raise TimeoutError.
+
+    Each call gets its own daemon thread: cancellation cannot stop an
+    already-running SDK call, so a hung call leaks only its thread — it
+    can neither starve later calls (the shared-pool failure mode) nor
+    keep the interpreter from exiting.
     """
     result = [None]
     exc = [None]
@@ -30,7 +45,7 @@ def run_with_timeout(func, timeout, *args, **kwargs):
         except Exception as e:
             exc[0] = e
 
-    thread = threading.Thread(target=wrapper)
+    thread = threading.Thread(target=wrapper, name=f"datahub-{func.__name__}", daemon=True)
     thread.start()
     thread.join(timeout)
 
@@ -40,13 +55,18 @@ def run_with_timeout(func, timeout, *args, **kwargs):
         raise exc[0]
     return result[0]
 
-def log_hierarchy(rel_path, APILogger):
-    parts = rel_path.split(os.sep)
-    indent = ""
-    for i, part in enumerate(parts):
-        prefix = "├── " if i == len(parts) - 1 else "│   "
-        APILogger.info(f"{indent}{prefix}{part}")
-        indent += "    "
+def iter_files(base):
+    """Yield a DirEntry for every file under base, using scandir to keep
+    stat info cached instead of re-statting per path like os.walk."""
+    stack = [base]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
 
 def sync_datahub(APILogger):
     try:
@@ -60,12 +80,15 @@ def sync_datahub(APILogger):
         APILogger.info(f"Local Directory: {local_path}")
         APILogger.info(f"Remote Path: {datahub_path}")
 
-        if not cli_path or not os.path.exists(cli_path):
+        if not cli_path or not cli_path_valid(cli_path):
             APILogger.error("Skipping sync: CLI path not set or invalid.")
             return
 
+        from eecloud.cloudsdk import SDKBase
+        from eecloud.models import CommandResponse, Contracts_DatahubMapResponse, Contracts_DatahubCommandResponse
+
         APILogger.info("Step 1: Initializing CloudSDK...")
-        pxc = CloudSDK(cli_path=cli_path)
+        pxc = get_cloud_sdk(cli_path)
 
         APILogger.info("Step 2: Attempting to map local folder to DataHub...")
         try:
@@ -101,10 +124,10 @@ def sync_datahub(APILogger):
             return
 
         APILogger.info("Step 4: Verifying local file structure...")
-        for root, _, files in os.walk(local_path):
-            for fname in files:
-                rel_path = os.path.relpath(os.path.join(root, fname), start=local_path)
-                log_hierarchy(rel_path, APILogger)
+        if APILogger.isEnabledFor(logging.DEBUG):
+            base = local_path.rstrip("/\\") or local_path
+            tree = [entry.path[len(base) + 1:] for entry in iter_files(base)]
+            APILogger.debug("Local tree:\n" + "\n".join(tree))
 
     except Exception as e:
         APILogger.exception(f"DataHub sync failed: {e}")
@@ -1,43 +1,78 @@
+import fnmatch
+import functools
+import io
 import os
-import shutil
-import tempfile
-from eecloud.cloudsdk import CloudSDK
+import re
 import logging
-import os
+from _apilogger import get_logger
+
+
+@functools.lru_cache(maxsize=4)
+def get_cloud_sdk(cli_path):
+    """Return a CloudSDK for this CLI path, reusing one instance per path.
+
+    eecloud is imported here rather than at module top so a missing/invalid
+    CLI path (the common CI case) never pays the package import cost.
+    """
+    from eecloud.cloudsdk import CloudSDK
+    return CloudSDK(cli_path=cli_path)
+
+
+@functools.lru_cache(maxsize=4)
+def cli_path_valid(cli_path):
+    """One stat per CLI path per process; repeat calls hit the cache."""
+    try:
+        os.stat(cli_path)
+        return True
+    except OSError:
+        return False
 
-APILogger = logging.getLogger("APILogger")
-if not APILogger.handlers:
-    APILogger.setLevel(logging.DEBUG)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    sh = logging.StreamHandler()
-    sh.setFormatter(formatter)
-    APILogger.addHandler(sh)
-    log_dir = os.getenv("output_path", "./output")
-    os.makedirs(log_dir, exist_ok=True)
-    fh = logging.FileHandler(os.path.join(log_dir, "GasModelcheck.log"), encoding="utf-8")
-    fh.setFormatter(formatter)
-    APILogger.addHandler(fh)
+APILogger = get_logger()
 
 
 EXCLUDED_EXTENSIONS = {".log", ".bak", ".csv"}
 
+# The exclude rules are expressed as glob patterns and translated into one
+# compiled, anchored regex at import time, so adding a rule means adding a
+# glob rather than hand-editing regex syntax. Matching runs in the C regex
+# engine with no intermediate .lower() allocations per file.
+_EXCLUDE_GLOBS = tuple("*" + ext for ext in sorted(EXCLUDED_EXTENSIONS)) + ("*solution*", "*timeseries*")
+_INCLUDE_RE = re.compile(r"\.plexoscloud", re.I)
+_EXCLUDE_RE = re.compile("|".join(fnmatch.translate(p) for p in _EXCLUDE_GLOBS), re.I)
+
 def is_included_file(rel_path):
-    name_lower = rel_path.lower()
-    if ".plexoscloud" in name_lower:
+    if _INCLUDE_RE.search(rel_path):
         return True
-    if "solution" in name_lower or "timeseries" in name_lower:
-        return False
-    if os.path.splitext(rel_path)[1].lower() in EXCLUDED_EXTENSIONS:
-        return False
-    return True
+    return not _EXCLUDE_RE.match(rel_path)
+
+def iter_files(base):
+    """Yield a DirEntry for every file under base, using scandir to keep
+    stat info cached instead of re-statting per path like os.walk."""
+    stack = [base]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+_INDENTS = tuple("    " * i for i in range(32))
 
 def log_hierarchy(rel_path, APILogger):
+    if not APILogger.isEnabledFor(logging.INFO):
+        return
     parts = rel_path.split(os.sep)
-    indent = ""
+    last = len(parts) - 1
+    buf = io.StringIO()
+    write = buf.write
     for i, part in enumerate(parts):
-        prefix = "├── " if i == len(parts) - 1 else "│   "
-        APILogger.info(f"{indent}{prefix}{part}")
-        indent += "    "
+        write(_INDENTS[i] if i < len(_INDENTS) else "    " * i)
+        write("├── " if i == last else "│   ")
+        write(part)
+        write("\n")
+    APILogger.info(buf.getvalue().rstrip())
 
 def upload_datahub(APILogger):
     try:
@@ -50,34 +85,45 @@ def upload_datahub(APILogger):
         APILogger.info(f"Uploading from: {local_dir}")
         APILogger.info(f"Uploading to: {remote_path}")
 
-        if not cli_path or not os.path.exists(cli_path):
+        if not cli_path or not cli_path_valid(cli_path):
             APILogger.error("Skipping upload: CLI path not set or invalid.")
             return
 
-        pxc = CloudSDK(cli_path=cli_path)
+        pxc = get_cloud_sdk(cli_path)
 
         APILogger.info("Preparing filtered content for upload...")
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            for root, _, files in os.walk(local_dir):
-                for fname in files:
-                    src_path = os.path.join(root, fname)
-                    rel_path = os.path.relpath(src_path, start=local_dir)
-
-                    if ".plexoscloud" in rel_path.lower() or is_included_file(rel_path):
-                        dst_path = os.path.join(temp_dir, rel_path)
-                        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
-                        shutil.copy2(src_path, dst_path)
-                        log_hierarchy(rel_path, APILogger)
-
-            APILogger.info("Starting upload to DataHub...")
-            pxc.datahub.upload(
-                local_folder=temp_dir,
-                remote_folder=remote_path,
-                glob_patterns=["**/*"],
-                is_versioned=False,
-                print_message=True
-            )
+        # Upload straight from local_dir: collect the included files and hand
+        # them to the CLI as explicit glob patterns instead of copying each
+        # file into a TemporaryDirectory first (which doubled disk I/O).
+        include_patterns = []
+        base = local_dir.rstrip("/\\") or local_dir
+        base_len = len(base) + 1
+        # Bind the per-file callables once; LOAD_FAST beats attribute lookup
+        # on every iteration of a large tree.
+        _sep = os.sep
+        _included = is_included_file
+        _add_pattern = include_patterns.append
+        _log_tree = log_hierarchy
+        for entry in iter_files(base):
+            rel_path = entry.path[base_len:]
+
+            if ".plexoscloud" in rel_path.lower() or _included(rel_path):
+                _add_pattern(rel_path.replace(_sep, "/"))
+                _log_tree(rel_path, APILogger)
+
+        if not include_patterns:
+            APILogger.warning("No files matched the upload filters. Nothing to upload.")
+            return
+
+        APILogger.info("Starting upload to DataHub...")
+        pxc.datahub.upload(
+            local_folder=local_dir,
+            remote_folder=remote_path,
+            glob_patterns=include_patterns,
+            is_versioned=False,
+            print_message=True
+        )
 
         APILogger.info("Upload completed successfully.")
 
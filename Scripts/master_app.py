@@ -1,9 +1,11 @@
 import sys
 import os
+import select
 import time
 import subprocess
 import logging
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
 from datahub_sync import sync_datahub
 from datahub_upload import upload_datahub
 
@@ -11,22 +13,63 @@ from datahub_upload import upload_datahub
 scripts_dir = os.path.join(os.getcwd(), 'Scripts')
 sys.path.append(scripts_dir)
 
+def _wait_for_procs(procs):
+    """Wait for all child processes with a single poll() multiplex.
+
+    On Linux/Python 3.9+ each child gets a pidfd registered with one
+    poller, so any number of children are awaited with one blocking
+    syscall per wakeup instead of a waitpid loop per child. Falls back
+    to sequential wait() where pidfd_open is unavailable.
+    """
+    if hasattr(os, "pidfd_open"):
+        try:
+            poller = select.poll()
+            fds = {}
+            for proc in procs:
+                fd = os.pidfd_open(proc.pid)
+                poller.register(fd, select.POLLIN)
+                fds[fd] = proc
+            remaining = set(fds)
+            while remaining:
+                for fd, _ in poller.poll():
+                    remaining.discard(fd)
+            for fd in fds:
+                os.close(fd)
+        except OSError:
+            pass
+    # Reap (a no-op wait if the pidfd already signalled exit).
+    return [proc.wait() for proc in procs]
+
+
 def run_step(command, name, wait=True):
     print(f"\n=== Running: {name} ===")
     start = time.time()
     if wait:
-        result = subprocess.run(command)
+        proc = subprocess.Popen(command)
+        returncode = _wait_for_procs([proc])[0]
         duration = time.time() - start
         print(f"{name} completed in {duration:.2f} seconds.")
-        if result.returncode != 0:
-            print(f"{name} failed with return code {result.returncode}. Halting pipeline.")
-            sys.exit(result.returncode)
-        return result.returncode
+        if returncode != 0:
+            print(f"{name} failed with return code {returncode}. Halting pipeline.")
+            sys.exit(returncode)
+        return returncode
     else:
         subprocess.Popen(command)
         print(f"{name} launched as a background process.")
         return 0
 
+
+def scan_parquet(solution_path):
+    """Stream the directory with scandir and stop at the first .parquet
+    entry, instead of materializing the full listing via os.listdir
+    (PLEXOS solution folders can hold thousands of files)."""
+    try:
+        with os.scandir(solution_path) as it:
+            return any(entry.name.endswith(".parquet") for entry in it)
+    except FileNotFoundError:
+        return False
+
+
 def assert_file_exists(path, name):
     if not os.path.exists(path):
         raise FileNotFoundError(f"Required file not found: {name} at {path}")
@@ -34,12 +77,11 @@ def assert_file_exists(path, name):
 
 def main():
     print("Starting pipeline...")
-    load_dotenv()
+    cfg = settings()
 
-    model_name = os.getenv("model_name")
-    simulation_path = os.getenv("simulation_path", "/simulation")
-    reference_db_path = os.path.join(simulation_path, "reference.db")
-    output_path = os.getenv("output_path", "./output")
+    model_name = cfg.model_name
+    reference_db_path = os.path.join(cfg.simulation_path, "reference.db")
+    output_path = cfg.output_path
 
     if not model_name:
         raise EnvironmentError("Missing 'model_name' in .env file.")
@@ -60,16 +102,20 @@ def main():
     run_step(["python", "Scripts/run_simulation.py"], "Simulation")  # Updated path
     assert_file_exists(reference_db_path, "reference.db")
 
-    run_step(["python", "Scripts/write_memberships.py"], "Write Memberships")  # Updated path
-    run_step(["python", "Scripts/prepare_duckdb.py", model_name], "Prepare DuckDB Views")  # Updated path
-
     solution_folder = f"Model {model_name} Solution"
     solution_path = os.path.join(output_path, solution_folder)
-    parquet_exists = (
-        any(f.endswith(".parquet") for f in os.listdir(solution_path))
-        if os.path.exists(solution_path)
-        else False
-    )
+
+    # write_memberships and the parquet existence scan don't depend on each
+    # other, so overlap them; prepare_duckdb stays serialized behind
+    # write_memberships because its view DDL reads the reference DB output.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        memberships = ex.submit(run_step, ["python", "Scripts/write_memberships.py"], "Write Memberships")
+        parquet_scan = ex.submit(scan_parquet, solution_path)
+        memberships.result()
+        parquet_exists = parquet_scan.result()
+
+    run_step(["python", "Scripts/prepare_duckdb.py", model_name], "Prepare DuckDB Views")  # Updated path
+
     if not parquet_exists:
         raise FileNotFoundError(f"No .parquet files found in {solution_path} before processing.")
 
@@ -3,7 +3,9 @@ import os
 import duckdb
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from dotenv import load_dotenv
+from functools import lru_cache
 
 # --- Config and Setup ---
 st.set_page_config(page_title="Gas & Power Dashboard", layout="wide")
@@ -18,57 +20,207 @@ MAX_ROWS = 3000
 if not os.path.exists(db_path):
     from prepare_duckdb import prepare_duckdb
     prepare_duckdb(model_name)
-con = duckdb.connect(db_path, read_only=True)
+
+@st.cache_resource(show_spinner=False)
+def get_con():
+    """Open the database once per server process. Streamlit re-executes
+    this script on every widget interaction, and reconnecting each time
+    re-parses the catalog and throws away DuckDB's warm buffer pool.
+
+    Also resolves the fact relation: prepare_duckdb materializes the
+    three-way join as fact_series, so every chart is a filtered scan of
+    one wide table instead of repeating the hash joins. Older .ddb files
+    without it get the same shape as a TEMP view.
+    """
+    con = duckdb.connect(db_path, read_only=True)
+    con.execute(f"PRAGMA threads={os.cpu_count() or 4}")
+    con.execute("PRAGMA memory_limit='2GB'")
+    tables = {r[0] for r in con.execute("SHOW TABLES").fetchall()}
+    if "fact_series" in tables:
+        source = "fact_series"
+    else:
+        from prepare_duckdb import NORMALIZED_DATA_VIEW_SQL
+        con.execute(f"CREATE OR REPLACE TEMP VIEW normalized_data AS {NORMALIZED_DATA_VIEW_SQL}")
+        source = "normalized_data"
+    return con, source
+
+con, FACT_RELATION = get_con()
 
 # --- Dynamic Filters ---
-phases_df = con.execute("SELECT DISTINCT PhaseName FROM fullkeyinfo WHERE PhaseName IS NOT NULL").fetchdf()
-phases = sorted(phases_df["PhaseName"].dropna().unique().tolist())
-period_types_df = con.execute("SELECT DISTINCT PeriodTypeName FROM fullkeyinfo WHERE PeriodTypeName IS NOT NULL").fetchdf()
-period_types = sorted(period_types_df["PeriodTypeName"].dropna().unique().tolist())
+# Small option lists: fetchall() avoids materializing a DataFrame just to
+# call .tolist() on one column.
+phases = sorted(r[0] for r in con.execute(
+    "SELECT DISTINCT PhaseName FROM fullkeyinfo WHERE PhaseName IS NOT NULL").fetchall())
+period_types = sorted(r[0] for r in con.execute(
+    "SELECT DISTINCT PeriodTypeName FROM fullkeyinfo WHERE PeriodTypeName IS NOT NULL").fetchall())
 
 st.sidebar.header("Global Filters")
 phase = st.sidebar.selectbox("Phase", phases, key="phase_filter")
 period_type = st.sidebar.selectbox("Period Type", period_types, key="period_type_filter")
 max_rows = st.sidebar.slider("Max Rows", 1000, 10000, MAX_ROWS)
+top_n = st.sidebar.slider("Top Contributors", 3, 25, 10)
+
+_date_min, _date_max = con.execute(
+    "SELECT MIN(CAST(StartDate AS TIMESTAMP)), MAX(CAST(StartDate AS TIMESTAMP)) FROM Period"
+).fetchone()
+date_range = st.sidebar.date_input(
+    "Date Range", (_date_min, _date_max), min_value=_date_min, max_value=_date_max
+)
+# date_input yields a single date while the user is mid-selection.
+date_start, date_end = (date_range if len(date_range) == 2 else (_date_min, _date_max))
+
+# Dropdown values are exact strings pulled from the table, so match with =
+# (ILIKE defeats zone-map pruning); the leading ChildClassName predicate and
+# the Timestamp window bound the scan. The query aggregates to
+# (Timestamp, Object) and buckets everything outside the top-N objects as
+# 'Other' inside DuckDB, so its vectorized engine does the groupby and only
+# chart-sized rows cross into pandas. Only the keyword count varies the SQL
+# text, so repeat calls hand DuckDB an identical string and it reuses the
+# cached plan (DuckDB rejects ? parameters inside EXECUTE, so server-side
+# PREPARE is not an option).
+_LOAD_QUERY_TEMPLATE = """
+    WITH base AS (
+        SELECT Timestamp,
+               Object,
+               SUM(Value) AS Value
+        FROM {fact}
+        WHERE ChildClassName = ?
+          AND PhaseName = ?
+          AND PeriodTypeName = ?
+          AND ({keyword_clause})
+          AND Timestamp BETWEEN CAST(? AS TIMESTAMP) AND CAST(? AS TIMESTAMP)
+          AND Object IS NOT NULL
+          AND Value IS NOT NULL
+        GROUP BY 1, 2
+    ),
+    ranked AS (
+        SELECT Object, ROW_NUMBER() OVER (ORDER BY SUM(Value) DESC) AS rn
+        FROM base GROUP BY Object
+    )
+    SELECT base.Timestamp,
+           CASE WHEN ranked.rn <= ? THEN base.Object ELSE 'Other' END AS Object,
+           SUM(base.Value) AS Value
+    FROM base JOIN ranked USING (Object)
+    GROUP BY 1, 2
+    ORDER BY 1
+    LIMIT ?
+"""
+
+@lru_cache(maxsize=64)
+def _load_query(n_keywords):
+    clause = " OR ".join(["LOWER(PropertyName) LIKE ?"] * n_keywords)
+    return _LOAD_QUERY_TEMPLATE.format(fact=FACT_RELATION, keyword_clause=clause)
 
 @st.cache_data(show_spinner=False)
-def load_data(child_class, keywords, phase, period_type, max_rows):
+def load_data(child_class, keywords, phase, period_type, max_rows, top_n, date_start, date_end):
     if not keywords:
         return pd.DataFrame()
-    keyword_clause = " OR ".join([f"LOWER(fki.PropertyName) LIKE '%{kw.lower()}%'" for kw in keywords])
-    query = f'''
-        SELECT Period.StartDate AS Timestamp,
-               fki.ChildObjectName AS Object,
-               fki.PropertyName AS Property,
-               data.Value
-        FROM fullkeyinfo fki
-        JOIN data ON fki.SeriesId = data.SeriesId
-        JOIN Period ON data.PeriodId = Period.PeriodId
-        WHERE fki.PhaseName ILIKE '{phase}'
-          AND fki.PeriodTypeName ILIKE '{period_type}'
-          AND fki.ChildClassName = '{child_class}'
-          AND ({keyword_clause})
-        LIMIT {max_rows}
-    '''
-    df = con.execute(query).fetchdf()
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+    params = [child_class, phase, period_type,
+              *[f"%{kw.lower()}%" for kw in keywords],
+              str(date_start), str(date_end), top_n, max_rows]
+    # Arrow export is zero-copy out of DuckDB; fetchdf() would box every
+    # Object string into a Python object on the way to pandas.
+    df = con.execute(_load_query(len(keywords)), params).fetch_arrow_table().to_pandas()
+    # Timestamp arrives as datetime64 straight from Arrow and NULLs are
+    # filtered in the WHERE clause, so no to_datetime/dropna pass here.
+    # Dictionary-encode the label column: groupby and Plotly color mapping
+    # then work on int codes instead of re-hashing Python strings.
+    df["Object"] = df["Object"].astype("category")
+    df["Unit"] = _unit_for(child_class, keywords)
+    return df
 
+def _unit_for(child_class, keywords):
     if child_class == "Region":
         if any(k in str(keywords).lower() for k in ["price", "srmc"]):
-            df["Unit"] = "$ / MWh"
-        elif "cost" in str(keywords).lower():
-            df["Unit"] = "$"
-        else:
-            df["Unit"] = "unit"
-    else:
-        df["Unit"] = "TJ"
-    return df.dropna()
+            return "$ / MWh"
+        if "cost" in str(keywords).lower():
+            return "$"
+        return "unit"
+    return "TJ"
+
+@st.cache_data(show_spinner=False)
+def load_data_multi(child_class, properties, phase, period_type, max_rows, top_n, date_start, date_end):
+    """One IN-list query for a whole tab instead of one round-trip per
+    property: the scan/join cost is paid once and the result is split
+    per Property in pandas before charting."""
+    if not properties:
+        return pd.DataFrame()
+    in_list = ", ".join(["?"] * len(properties))
+    query = f"""
+        WITH base AS (
+            SELECT Timestamp,
+                   Object,
+                   PropertyName AS Property,
+                   SUM(Value) AS Value
+            FROM {FACT_RELATION}
+            WHERE ChildClassName = ?
+              AND PhaseName = ?
+              AND PeriodTypeName = ?
+              AND PropertyName IN ({in_list})
+              AND Timestamp BETWEEN CAST(? AS TIMESTAMP) AND CAST(? AS TIMESTAMP)
+              AND Object IS NOT NULL
+              AND Value IS NOT NULL
+            GROUP BY 1, 2, 3
+        ),
+        ranked AS (
+            SELECT Property, Object,
+                   ROW_NUMBER() OVER (PARTITION BY Property ORDER BY SUM(Value) DESC) AS rn
+            FROM base GROUP BY Property, Object
+        )
+        SELECT base.Timestamp, base.Property,
+               CASE WHEN ranked.rn <= ? THEN base.Object ELSE 'Other' END AS Object,
+               SUM(base.Value) AS Value
+        FROM base
+        JOIN ranked ON base.Property = ranked.Property AND base.Object = ranked.Object
+        GROUP BY 1, 2, 3
+        ORDER BY 1
+        LIMIT ?
+    """
+    params = [child_class, phase, period_type, *properties,
+              str(date_start), str(date_end), top_n, max_rows]
+    df = con.execute(query, params).fetch_arrow_table().to_pandas()
+    df["Object"] = df["Object"].astype("category")
+    df["Property"] = df["Property"].astype("category")
+    return df
+
+@st.cache_data(show_spinner=False)
+def get_properties(class_name, phase, period_type):
+    """Distinct property names for one (class, phase, period) key. The
+    sections loop asked this per tab on every rerun — ~10 DISTINCT scans
+    per page load; cache_data serves repeats from memory."""
+    return sorted(r[0] for r in con.execute(
+        f"""SELECT DISTINCT PropertyName FROM {FACT_RELATION}
+            WHERE ChildClassName = ? AND PhaseName = ? AND PeriodTypeName = ?
+              AND PropertyName IS NOT NULL""",
+        [class_name, phase, period_type]).fetchall())
+
+def _downsample_for_plot(d, max_points=800):
+    """Plotly payload and render time grow with point count; past
+    ~max_points distinct timestamps, re-bin into coarser buckets whose
+    width is derived from the span. Sums per bin keep bar/line charts
+    reading the same."""
+    if d.empty or d["Timestamp"].nunique() <= max_points:
+        return d
+    span = d["Timestamp"].max() - d["Timestamp"].min()
+    if pd.isna(span) or span <= pd.Timedelta(0):
+        return d
+    unit = d["Unit"].iloc[0] if "Unit" in d else None
+    out = (
+        d.groupby([pd.Grouper(key="Timestamp", freq=span / max_points), "Object"],
+                  observed=True)["Value"]
+        .sum()
+        .reset_index()
+    )
+    if unit is not None:
+        out["Unit"] = unit
+    return out
 
 def render_chart(df, y_label, tab_suffix="", chart_type="bar"):
     if df.empty:
         st.warning("No data found.")
         return
 
+    df = _downsample_for_plot(df)
     units = df["Unit"].dropna().unique()
     unit_label = units[0] if len(units) == 1 else "various"
     st.markdown(f"**Insight:** Showing latest trends for `{y_label}` in `{unit_label}`")
@@ -103,16 +255,19 @@ def render_chart(df, y_label, tab_suffix="", chart_type="bar"):
             opacity=0.85
         )
     else:
-        fig = px.line(
-            df,
-            x="Timestamp",
-            y="Value",
-            color="Object",
-            title=chart_title,
-            labels={"Value": y_title},
-            template="plotly_dark",
-            color_discrete_sequence=color_sequence
-        )
+        # Scattergl renders through WebGL: SVG line traces degrade past a
+        # couple of thousand points per series, WebGL scales far beyond
+        # that with much lower DOM memory.
+        fig = go.Figure()
+        for i, (obj, grp) in enumerate(df.groupby("Object", observed=True, sort=False)):
+            fig.add_trace(go.Scattergl(
+                x=grp["Timestamp"],
+                y=grp["Value"],
+                mode="lines",
+                name=str(obj),
+                line=dict(color=color_sequence[i % len(color_sequence)]),
+            ))
+        fig.update_layout(title=chart_title, yaxis_title=y_title, template="plotly_dark")
 
     fig.update_layout(barmode="group", margin=dict(l=20, r=20, t=40, b=20), height=420)
     chart_key = f"chart_{y_label}_{tab_suffix}".replace(" ", "_").lower()
@@ -120,9 +275,14 @@ def render_chart(df, y_label, tab_suffix="", chart_type="bar"):
 
     with st.expander("Show table"):
         st.dataframe(df.head(100))
-        csv = df.to_csv(index=False).encode('utf-8')
         unique_key = f"download_{y_label}_{tab_suffix}".replace(" ", "_").lower()
-        st.download_button("Download CSV", data=csv, file_name=f"{unique_key}.csv", key=unique_key)
+        # Serialize the CSV only on click instead of on every rerun.
+        st.download_button(
+            "Download CSV",
+            data=lambda df=df: df.head(100).to_csv(index=False).encode('utf-8'),
+            file_name=f"{unique_key}.csv",
+            key=unique_key,
+        )
 
 # --- TABS ---
 tabs = st.tabs([
@@ -135,15 +295,15 @@ with tabs[0]:
     st.title("Gas & Power Dashboard")
     col1, col2 = st.columns(2)
     with col1:
-        df_prod = load_data("Gas Plant", ["production"], phase, period_type, max_rows)
+        df_prod = load_data("Gas Plant", ["production"], phase, period_type, max_rows, top_n, date_start, date_end)
         total_prod = df_prod["Value"].sum() if not df_prod.empty else 0
         peak_prod = df_prod["Value"].max() if not df_prod.empty else 0
         st.metric("Production (TJ) - Total", f"{int(total_prod):,}")
         st.metric("Production (TJ) - Peak", f"{int(peak_prod):,}")
     with col2:
-        df_demand = load_data("Gas Demand", ["hydrogen demand", "h2 demand", "offtake", "demand"], phase, period_type, max_rows)
+        df_demand = load_data("Gas Demand", ["hydrogen demand", "h2 demand", "offtake", "demand"], phase, period_type, max_rows, top_n, date_start, date_end)
         if df_demand.empty:
-            df_demand = load_data("Gas Node", ["demand"], phase, period_type, max_rows)
+            df_demand = load_data("Gas Node", ["demand"], phase, period_type, max_rows, top_n, date_start, date_end)
         total_demand = df_demand["Value"].sum() if not df_demand.empty else 0
         peak_demand = df_demand["Value"].max() if not df_demand.empty else 0
         st.metric("Demand (TJ) - Total", f"{int(total_demand):,}")
@@ -159,18 +319,18 @@ with tabs[0]:
     st.subheader("Cost and Price Metrics")
     col3, col4 = st.columns(2)
     with col3:
-        df_price = load_data("Region", ["price"], phase, period_type, max_rows)
+        df_price = load_data("Region", ["price"], phase, period_type, max_rows, top_n, date_start, date_end)
         avg_price = df_price["Value"].mean() if not df_price.empty else 0
         st.metric("Avg Region Price ($/MWh)", f"{avg_price:,.2f}")
     with col4:
-        df_srmc = load_data("Region", ["srmc"], phase, period_type, max_rows)
+        df_srmc = load_data("Region", ["srmc"], phase, period_type, max_rows, top_n, date_start, date_end)
         if df_srmc.empty:
-            df_srmc = load_data("Generator", ["srmc"], phase, period_type, max_rows)
+            df_srmc = load_data("Generator", ["srmc"], phase, period_type, max_rows, top_n, date_start, date_end)
         avg_srmc = df_srmc["Value"].mean() if not df_srmc.empty else 0
 
-        df_cost = load_data("Region", ["total generation cost", "generation cost"], phase, period_type, max_rows)
+        df_cost = load_data("Region", ["total generation cost", "generation cost"], phase, period_type, max_rows, top_n, date_start, date_end)
         if df_cost.empty:
-            df_cost = load_data("Generator", ["total generation cost", "generation cost"], phase, period_type, max_rows)
+            df_cost = load_data("Generator", ["total generation cost", "generation cost"], phase, period_type, max_rows, top_n, date_start, date_end)
         total_cost = df_cost["Value"].sum() if not df_cost.empty else 0
 
         st.metric("Avg SRMC ($/MWh)", f"{avg_srmc:,.2f}")
@@ -203,15 +363,7 @@ for tab_index, tab_title, class_name, default_keywords in sections:
     with tabs[tab_index]:
         st.header(tab_title)
 
-        prop_query = f"""
-            SELECT DISTINCT fki.PropertyName
-            FROM fullkeyinfo fki
-            WHERE fki.ChildClassName = '{class_name}'
-              AND fki.PhaseName ILIKE '{phase}'
-              AND fki.PeriodTypeName ILIKE '{period_type}'
-        """
-        prop_df = con.execute(prop_query).fetchdf()
-        all_properties = sorted(prop_df["PropertyName"].dropna().tolist())
+        all_properties = get_properties(class_name, phase, period_type)
 
         default_selection = [p for p in all_properties if any(k in p.lower() for k in default_keywords)]
         default_selection = default_selection or all_properties[:1]
@@ -229,6 +381,15 @@ for tab_index, tab_title, class_name, default_keywords in sections:
         if not selected_properties:
             st.info("Select at least one property to show charts.")
         else:
+            # One query for the whole tab, split per property afterwards.
+            df_multi = load_data_multi(
+                class_name, tuple(selected_properties), phase, period_type,
+                max_rows, top_n, date_start, date_end
+            )
             for prop in selected_properties:
-                df = load_data(class_name, [prop], phase, period_type, max_rows)
+                if df_multi.empty:
+                    df = df_multi
+                else:
+                    df = df_multi[df_multi["Property"] == prop].drop(columns="Property")
+                    df = df.assign(Unit=_unit_for(class_name, [prop]))
                 render_chart(df, prop, tab_suffix=tab_title.lower().replace(" ", "_"), chart_type=chart_mode)
@@ -1,7 +1,6 @@
 import os
 import sys
 import duckdb
-import glob
 import re
 from typing import List, Optional
 from dotenv import load_dotenv
@@ -25,17 +24,137 @@ if not APILogger.handlers:
     APILogger.addHandler(fh)
 
 
+# Pre-normalized three-way join used by the dashboards. Unit labelling moves
+# out of per-query pandas passes and into a columnar CASE expression; the body
+# is shared so dashboards can build the same view as a TEMP fallback when they
+# open an older .ddb that does not ship it.
+# Column layout of memberships_data.csv as written by write_memberships.py.
+# Passing it to read_csv skips the sniffer's sampling pass and lets the
+# parallel CSV reader start immediately with a known schema.
+MEMBERSHIPS_SCHEMA = {
+    'parent_class': 'VARCHAR',
+    'child_class': 'VARCHAR',
+    'collection': 'VARCHAR',
+    'parent_object': 'VARCHAR',
+    'child_object': 'VARCHAR',
+    'subcollection_name': 'VARCHAR',
+}
+
+
+def _memberships_columns_sql() -> str:
+    """Render MEMBERSHIPS_SCHEMA as a read_csv columns={...} literal."""
+    pairs = ", ".join(f"'{name}': '{dtype}'" for name, dtype in MEMBERSHIPS_SCHEMA.items())
+    return "{" + pairs + "}"
+
+
+NORMALIZED_DATA_VIEW_SQL = """
+    SELECT
+        CAST(Period.StartDate AS TIMESTAMP) AS Timestamp,
+        fki.ChildObjectName AS Object,
+        fki.ChildClassName,
+        fki.PropertyName,
+        fki.PhaseName,
+        fki.PeriodTypeName,
+        CASE
+            WHEN fki.ChildClassName = 'Region'
+                 AND regexp_matches(LOWER(fki.PropertyName), 'price|srmc|marginal cost|lcoe')
+                THEN '$ / MWh'
+            WHEN fki.ChildClassName = 'Region' AND LOWER(fki.PropertyName) LIKE '%cost%'
+                THEN '$'
+            ELSE 'TJ'
+        END AS Unit,
+        data.Value
+    FROM fullkeyinfo fki
+    JOIN data ON fki.SeriesId = data.SeriesId
+    JOIN Period ON data.PeriodId = Period.PeriodId
+"""
+
+
 def sanitize_view_name(path: str, base: str) -> str:
     rel_name = os.path.relpath(path, base)
     return re.sub(r'\W+', '_', rel_name).strip('_')
 
 
-def find_subdirectories(root_dir: str) -> List[str]:
-    subdirectories: List[str] = []
-    for dirpath, dirnames, _ in os.walk(root_dir):
-        for dirname in dirnames:
-            subdirectories.append(os.path.join(dirpath, dirname))
-    return subdirectories
+def collect_parquet_tree(root_dir: str) -> (List[str], List[str]):
+    """One scandir traversal of the model tree returning both the
+    subdirectory list and every .parquet file path. Replaces the old
+    os.walk pass plus a recursive glob per subdirectory, which stat'd
+    the same entries twice over."""
+    subdirs: List[str] = []
+    files: List[str] = []
+    stack = [root_dir]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        stack.append(entry.path)
+                    elif entry.name.endswith(".parquet"):
+                        files.append(entry.path)
+        except FileNotFoundError:
+            continue
+    return subdirs, files
+
+
+def _sql_file_list(files: List[str]) -> str:
+    """Render an explicit file list for read_parquet. DuckDB scans a
+    list of files in parallel and skips re-expanding a glob pattern
+    inside the engine."""
+    return "[" + ", ".join("'" + f.replace("'", "''") + "'" for f in files) + "]"
+
+
+def _probe_lock(filepath: str) -> bool:
+    """Answer "can this process lock the file right now?" with one
+    targeted syscall (non-blocking exclusive lock, released straight
+    away) instead of walking every process's open files."""
+    try:
+        # No O_CREAT: probing must not create the .ddb as a side effect.
+        fd = os.open(filepath, os.O_RDWR)
+    except FileNotFoundError:
+        # Nothing can hold a lock on a file that does not exist.
+        return True
+    except OSError:
+        return False
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            # lockf maps to POSIX record locks (fcntl F_SETLK), the
+            # family DuckDB uses on its database file; flock (BSD
+            # locks) would not conflict with them on Linux.
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.lockf(fd, fcntl.LOCK_UN)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+
+def _find_locking_pid(filepath: str) -> Optional[int]:
+    """Identify which process holds the file. Only used to report the
+    PID after the cheap probe has already failed every retry."""
+    target = os.path.abspath(filepath)
+    own_pid = os.getpid()
+    for proc in psutil.process_iter(['pid']):
+        if proc.info['pid'] in (0, own_pid):
+            continue
+        try:
+            # oneshot() batches the per-process lookups into one read
+            # instead of a stat per attribute.
+            with proc.oneshot():
+                files = proc.open_files()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+        for f in files:
+            if os.path.abspath(f.path) == target:
+                return proc.info['pid']
+    return None
 
 
 def is_file_locked(filepath: str, retries: int = 5, delay: int = 2) -> Optional[int]:
@@ -44,25 +163,13 @@ def is_file_locked(filepath: str, retries: int = 5, delay: int = 2) -> Optional[
     Returns PID if locked after retries, else None.
     """
     for _ in range(retries):
-        locked_pid = None
-        for proc in psutil.process_iter(['pid', 'open_files']):
-            try:
-                files = proc.info.get('open_files')
-                if files:
-                    for f in files:
-                        if os.path.abspath(f.path) == os.path.abspath(filepath):
-                            locked_pid = proc.info['pid']
-                            break
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-
-        if not locked_pid:
+        if _probe_lock(filepath):
             return None
 
-        print(f"File is locked by PID {locked_pid}. Retrying in {delay} seconds...")
+        print(f"File is locked. Retrying in {delay} seconds...")
         time.sleep(delay)
 
-    return locked_pid
+    return _find_locking_pid(filepath)
 
 
 def prepare_duckdb(model_name: str, verbose_log: bool = False) -> None:
@@ -70,6 +177,12 @@ def prepare_duckdb(model_name: str, verbose_log: bool = False) -> None:
     Build a SELF-CONTAINED DuckDB file (solution_views.ddb) by MATERIALIZING parquet-backed
     datasets into DuckDB TABLES (not VIEWS). This prevents the deployed Streamlit app from
     trying to read parquet files at runtime (e.g., from Windows C:\\Users\\... paths).
+
+    Setting duckdb_views_mode=1 in the environment registers the big datasets as
+    VIEWS over explicit parquet file lists instead, skipping the parquet-to-DuckDB
+    rewrite entirely (fullkeyinfo is still materialized, since it carries the unit
+    join and its derived columns). Views mode is for local runs only: the .ddb
+    then references absolute parquet paths and is no longer portable.
     """
     output_path = os.getenv('output_path')
     if not output_path:
@@ -80,6 +193,7 @@ def prepare_duckdb(model_name: str, verbose_log: bool = False) -> None:
         raise FileNotFoundError(f"Expected model output directory not found: {model_directory}")
 
     duck_file_path = os.path.join(output_path, 'solution_views.ddb')
+    views_mode = os.getenv('duckdb_views_mode', '0') == '1'
 
     lock_pid = is_file_locked(duck_file_path)
     if lock_pid:
@@ -90,7 +204,7 @@ def prepare_duckdb(model_name: str, verbose_log: bool = False) -> None:
     print(f"Preparing DuckDB tables at: {duck_file_path}")
     print(f"Model output found: {model_directory}")
 
-    directories = find_subdirectories(model_directory)
+    directories, all_parquet_files = collect_parquet_tree(model_directory)
     if not directories:
         print(f"No subdirectories found under {model_directory}")
 
@@ -100,23 +214,37 @@ def prepare_duckdb(model_name: str, verbose_log: bool = False) -> None:
         'unit': 'unit'
     }
 
-    fullkeyinfo_path = None
+    fullkeyinfo_files: List[str] = []
 
     with duckdb.connect(duck_file_path) as con:
+        # Bulk-ingestion settings: fan the parquet reader out across all
+        # cores, and drop insertion-order preservation, which serializes
+        # parallel scans (row order is irrelevant while materializing;
+        # the data table gets an explicit ORDER BY anyway).
+        con.execute(f"PRAGMA threads={os.cpu_count() or 4}")
+        con.execute("PRAGMA preserve_insertion_order=false")
+
+        # Cap DuckDB at ~60% of system RAM and give it a spill directory
+        # so large CREATE TABLE ... read_parquet() materializations spill
+        # to disk instead of getting OOM-killed on big solutions.
+        total_ram = psutil.virtual_memory().total
+        con.execute(f"PRAGMA memory_limit='{int(total_ram * 0.6) // (1 << 20)}MB'")
+        con.execute(f"PRAGMA temp_directory='{os.path.join(output_path, 'duckdb_tmp')}'")
+
         created_objects: List[str] = []
 
         for item in directories:
-            path = os.path.join(item, "**", "*.parquet")
             base_name = os.path.basename(item).lower()
 
-            parquet_files = glob.glob(path, recursive=True)
-            if not parquet_files:
+            prefix = item + os.sep
+            dir_files = [f for f in all_parquet_files if f.startswith(prefix)]
+            if not dir_files:
                 if verbose_log:
                     print(f"Skipped: No parquet files found in {item}")
                 continue
 
             if base_name == "fullkeyinfo":
-                fullkeyinfo_path = path
+                fullkeyinfo_files = dir_files
                 continue
 
             table_name = canonical_views.get(base_name, sanitize_view_name(item, model_directory))
@@ -124,56 +252,93 @@ def prepare_duckdb(model_name: str, verbose_log: bool = False) -> None:
                 print(f"Skipped: Could not derive valid table name for {item}")
                 continue
 
+            # Sorting data by SeriesId clusters each series into contiguous
+            # row groups, so DuckDB's min/max zone maps can skip whole groups
+            # when the join/filter narrows to a handful of SeriesIds.
+            order_clause = " ORDER BY SeriesId" if table_name == "data" else ""
+
             try:
-                # Materialize parquet into a DuckDB TABLE (self-contained)
+                # Drop both shapes so switching modes on an existing .ddb
+                # never collides with a leftover table or view.
+                con.execute(f"DROP VIEW IF EXISTS {table_name};")
                 con.execute(f"DROP TABLE IF EXISTS {table_name};")
-                con.execute(f"""
-                    CREATE TABLE {table_name} AS
-                    SELECT * FROM read_parquet('{path}');
-                """)
+                if views_mode:
+                    # Explicit file list (not a glob), so DuckDB still
+                    # parallelizes across files without re-listing the dir.
+                    con.execute(f"""
+                        CREATE VIEW {table_name} AS
+                        SELECT * FROM read_parquet({_sql_file_list(dir_files)});
+                    """)
+                else:
+                    # Materialize parquet into a DuckDB TABLE (self-contained).
+                    # The sorted data CTAS needs preserve_insertion_order back
+                    # on for its duration: with it off, the parallel insert
+                    # may reorder row groups and silently void the SeriesId
+                    # clustering the ORDER BY exists to produce.
+                    if order_clause:
+                        con.execute("PRAGMA preserve_insertion_order=true")
+                    try:
+                        con.execute(f"""
+                            CREATE TABLE {table_name} AS
+                            SELECT * FROM read_parquet({_sql_file_list(dir_files)}){order_clause};
+                        """)
+                    finally:
+                        if order_clause:
+                            con.execute("PRAGMA preserve_insertion_order=false")
                 created_objects.append(table_name)
                 if verbose_log:
-                    print(f"Table created: {table_name} <- {path}")
+                    kind = "View" if views_mode else "Table"
+                    print(f"{kind} created: {table_name} <- {len(dir_files)} parquet files in {item}")
             except Exception as e:
                 print(f"Failed to create table {table_name}: {e}")
 
         # Materialize fullkeyinfo (optionally joined with unit)
-        if fullkeyinfo_path:
+        if fullkeyinfo_files:
             try:
-                # Build base table from parquet
-                con.execute("DROP TABLE IF EXISTS fullkeyinfo_base;")
-                con.execute(f"""
-                    CREATE TABLE fullkeyinfo_base AS
-                    SELECT * FROM read_parquet('{fullkeyinfo_path}');
-                """)
+                file_list = _sql_file_list(fullkeyinfo_files)
 
-                # Inspect unit table if present
-                unit_columns: List[str] = []
-                try:
-                    unit_columns = [col[1] for col in con.execute("PRAGMA table_info(unit);").fetchall()]
-                except Exception as e:
-                    print(f"Warning: Unable to inspect 'unit' table: {e}")
+                # Probe for the unit join columns in one catalog query;
+                # this also covers the table being absent (count is 0).
+                has_unit_join = con.execute("""
+                    SELECT COUNT(*) FROM information_schema.columns
+                    WHERE lower(table_name) = 'unit'
+                      AND column_name IN ('UnitId', 'UnitName')
+                """).fetchone()[0] == 2
 
                 con.execute("DROP TABLE IF EXISTS fullkeyinfo;")
 
-                if 'UnitId' in unit_columns and 'UnitName' in unit_columns:
-                    con.execute("""
+                # One scan of the parquet with the (small) unit table as
+                # the hash-join build side: the old fullkeyinfo_base
+                # staging table materialized the whole dataset twice.
+                if has_unit_join:
+                    con.execute(f"""
                         CREATE TABLE fullkeyinfo AS
                         SELECT fki.*, u.UnitName
-                        FROM fullkeyinfo_base fki
+                        FROM read_parquet({file_list}) fki
                         LEFT JOIN unit u ON fki.UnitId = u.UnitId
                     """)
                     print("Table created: fullkeyinfo (joined with unit)")
                 else:
                     print("Warning: 'unit' table missing or missing required columns. Creating fullkeyinfo without join.")
-                    con.execute("""
+                    con.execute(f"""
                         CREATE TABLE fullkeyinfo AS
-                        SELECT * FROM fullkeyinfo_base
+                        SELECT * FROM read_parquet({file_list})
                     """)
                     print("Table created: fullkeyinfo (no join)")
 
-                # Cleanup base
-                con.execute("DROP TABLE IF EXISTS fullkeyinfo_base;")
+                # The dashboards always filter on this trio before the
+                # SeriesId join; the index gives the planner zone-map
+                # pruning on those columns.
+                con.execute("""
+                    CREATE INDEX idx_fki_class
+                    ON fullkeyinfo(ChildClassName, PhaseName, PeriodTypeName);
+                """)
+
+                # Pre-lower PropertyName once at build time so keyword
+                # searches match against a stored column instead of
+                # running LOWER() per row on every query.
+                con.execute("ALTER TABLE fullkeyinfo ADD COLUMN PropertyNameLower VARCHAR;")
+                con.execute("UPDATE fullkeyinfo SET PropertyNameLower = LOWER(PropertyName);")
 
                 created_objects.append("fullkeyinfo")
             except Exception as e:
@@ -181,6 +346,30 @@ def prepare_duckdb(model_name: str, verbose_log: bool = False) -> None:
         else:
             print("No fullkeyinfo parquet folder found. Skipping fullkeyinfo creation.")
 
+        try:
+            con.execute(f"CREATE OR REPLACE VIEW normalized_data AS {NORMALIZED_DATA_VIEW_SQL}")
+            print("View created: normalized_data")
+        except Exception as e:
+            print(f"Failed to create normalized_data view: {e}")
+
+        # Materialize the three-way join once so dashboard queries become
+        # filtered scans of one table instead of repeating the hash joins.
+        # Skipped in views mode, where deferring exactly this rewrite is
+        # the point; the dashboards fall back to the normalized_data view
+        # when fact_series is absent.
+        if views_mode:
+            con.execute("DROP TABLE IF EXISTS fact_series;")
+            print("Views mode: skipping fact_series materialization.")
+        else:
+            try:
+                con.execute("DROP TABLE IF EXISTS fact_series;")
+                con.execute(f"CREATE TABLE fact_series AS {NORMALIZED_DATA_VIEW_SQL}")
+                con.execute("CREATE INDEX fact_series_idx ON fact_series(ChildClassName, PhaseName, PeriodTypeName);")
+                created_objects.append("fact_series")
+                print("Table created: fact_series")
+            except Exception as e:
+                print(f"Failed to create fact_series table: {e}")
+
         if created_objects:
             print(f"{len(created_objects)} tables created in DuckDB.")
         else:
@@ -193,7 +382,9 @@ def prepare_duckdb(model_name: str, verbose_log: bool = False) -> None:
             con.execute("DROP TABLE IF EXISTS memberships;")
             con.execute(f"""
                 CREATE TABLE memberships AS
-                SELECT * FROM read_csv_auto('{memberships_csv}', HEADER=TRUE);
+                SELECT * FROM read_csv('{memberships_csv}',
+                                      header=true, delim=',',
+                                      columns={_memberships_columns_sql()});
             """)
             print("Memberships table created.")
         else: